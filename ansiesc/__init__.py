@@ -1,2 +1,9 @@
 from .codes import *
 from .fmt import *
+from .table import *
+from .live import *
+from .styled import *
+from .vterm import *
+from .jsoncolor import *
+from .overlay import *
+from .highlight import *
@@ -0,0 +1,82 @@
+"""Command-line interface for highlighting the output of commands."""
+
+import argparse
+import re
+import sys
+from typing import List, Optional, Sequence
+
+from .fmt import ansiprefix
+from .highlight import Highlighter
+
+
+def _style(spec: str) -> str:
+    # "ATTRIBS[:FORE[:BACK]]", e.g. "*:r" for bold red.
+    attribs, fore, back = (spec.split(":") + ["", ""])[:3]
+    return ansiprefix(attribs, fore or None, back or None)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m ansiesc",
+        description="Highlight the output of commands.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser(
+        "run",
+        help="run a command in a pseudoterminal and highlight its output",
+    )
+    bench_parser = commands.add_parser(
+        "bench", help="measure the latency added by highlighting"
+    )
+    for subparser in (run_parser, bench_parser):
+        subparser.add_argument(
+            "-r",
+            "--rule",
+            nargs=2,
+            action="append",
+            metavar=("PATTERN", "STYLE"),
+            help="highlight matches of the regular expression PATTERN in"
+            " STYLE given as ATTRIBS[:FORE[:BACK]] (e.g. '*:r' for bold red);"
+            " highlights errors and warnings by default",
+        )
+    run_parser.add_argument("args", nargs=argparse.REMAINDER, metavar="CMD")
+    bench_parser.add_argument(
+        "-n", "--chunks", type=int, default=2000, help="number of chunks"
+    )
+    bench_parser.add_argument(
+        "-s", "--size", type=int, default=1024, help="size of a chunk in bytes"
+    )
+    args = parser.parse_args(argv)
+
+    from . import run
+
+    try:
+        highlighter = Highlighter(
+            [(pattern, _style(style)) for pattern, style in args.rule]
+            if args.rule
+            else run.DEFAULT_RULES
+        )
+    except (ValueError, re.error) as exc:
+        parser.error(str(exc))
+    if args.command == "run":
+        cmd: List[str] = args.args
+        if cmd and cmd[0] == "--":
+            cmd = cmd[1:]
+        if not cmd:
+            parser.error("a command is required")
+        status = run.run(cmd, highlighter)
+        # Report a signal like a shell does.
+        return 128 - status if status < 0 else status
+    res = run.benchmark(args.chunks, args.size, highlighter)
+    print(
+        f"chunks of {args.size} bytes: plain copy {res['plain_mean']:.1f} us"
+        f" (p99 {res['plain_p99']:.1f} us), highlighted"
+        f" {res['highlighted_mean']:.1f} us"
+        f" (p99 {res['highlighted_p99']:.1f} us), added"
+        f" {res['added_mean']:.1f} us per read"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,16 @@
-"""Function for formatting strings with ANSI escape sequences."""
+"""Functions for formatting strings with ANSI escape sequences."""
 
-__all__ = ("TEXT_ATTRIBS", "BASIC_COLORS", "EXTENDED_COLORS", "ansifmt")
+__all__ = (
+    "TEXT_ATTRIBS",
+    "BASIC_COLORS",
+    "EXTENDED_COLORS",
+    "ansiprefix",
+    "ansifmt",
+)
 
 from functools import reduce
 from string import hexdigits
-from typing import Union, Sequence, Optional
+from typing import Union, Sequence, Optional, List
 
 from .codes import ANSIControl, ANSIText, ANSIColor
 
@@ -188,35 +194,13 @@ _COLOR24 = 1 << 24
 _Color = Optional[Union[int, float, str, Sequence[int], Sequence[float]]]
 
 
-def ansifmt(
-    string: str,
+def _sgr_params(
     attribs: str = "",
     fore: _Color = None,
     back: _Color = None,
     underline: _Color = None,
     extra_attribs: Optional[Sequence[int]] = None,
-) -> str:
-    """
-    Format a string by adding ANSI escape codes that change its graphics mode
-    to it.
-
-    Accepted colors are a character from `BASIC_COLORS` (uppercase for a bright
-    color), a string from `EXTENDED_COLORS`, a non-negative hexadecimal integer
-    less than 2^24 (24-bit color), a floating point number (gray color), an
-    array of one decimal integer (8-bit color), or an array of three decimal
-    integers or floating point numbers (24-bit color, RGB).  All decimal
-    integers should be non-negative and less than 2^8, and all floating point
-    numbers should be non-negative and not greater than 1.
-
-    :param string: a string to format
-    :param attribs: string of characters contained in `TEXT_ATTRIBS`
-    :param fore: the foreground color
-    :param back: the background color
-    :param underline: the underline color
-    :param extra_attribs: additional attributes
-    :return: `string` surrounded by the selected ANSI escape codes
-    :raise ValueError:
-    """
+) -> List[int]:
 
     def check_int(arg, max_arg):
         return isinstance(arg, int) and 0 <= arg < max_arg
@@ -327,8 +311,72 @@ def ansifmt(
                 )
     if extra_attribs is not None:
         fmt += extra_attribs
+    return fmt
+
+
+def ansiprefix(
+    attribs: str = "",
+    fore: _Color = None,
+    back: _Color = None,
+    underline: _Color = None,
+    extra_attribs: Optional[Sequence[int]] = None,
+) -> str:
+    """
+    Compile the ANSI escape code that changes the graphics mode to the selected
+    one.
+
+    The result can be stored and reused to format many strings with the same
+    style without parsing the style again.  A formatted string is the prefix
+    followed by the string and `ANSIControl.SGR.format("")`.  The parameters
+    are the same as those of `ansifmt`.
+
+    :param attribs: string of characters contained in `TEXT_ATTRIBS`
+    :param fore: the foreground color
+    :param back: the background color
+    :param underline: the underline color
+    :param extra_attribs: additional attributes
+    :return: the ANSI escape code selecting the graphics mode
+    :raise ValueError:
+    """
+    return ANSIControl.SGR.format(
+        ";".join(
+            str(f)
+            for f in _sgr_params(attribs, fore, back, underline, extra_attribs)
+        )
+    )
+
+
+def ansifmt(
+    string: str,
+    attribs: str = "",
+    fore: _Color = None,
+    back: _Color = None,
+    underline: _Color = None,
+    extra_attribs: Optional[Sequence[int]] = None,
+) -> str:
+    """
+    Format a string by adding ANSI escape codes that change its graphics mode
+    to it.
+
+    Accepted colors are a character from `BASIC_COLORS` (uppercase for a bright
+    color), a string from `EXTENDED_COLORS`, a non-negative hexadecimal integer
+    less than 2^24 (24-bit color), a floating point number (gray color), an
+    array of one decimal integer (8-bit color), or an array of three decimal
+    integers or floating point numbers (24-bit color, RGB).  All decimal
+    integers should be non-negative and less than 2^8, and all floating point
+    numbers should be non-negative and not greater than 1.
+
+    :param string: a string to format
+    :param attribs: string of characters contained in `TEXT_ATTRIBS`
+    :param fore: the foreground color
+    :param back: the background color
+    :param underline: the underline color
+    :param extra_attribs: additional attributes
+    :return: `string` surrounded by the selected ANSI escape codes
+    :raise ValueError:
+    """
     return (
-        ANSIControl.SGR.format(";".join(str(f) for f in fmt))
+        ansiprefix(attribs, fore, back, underline, extra_attribs)
         + string
         + ANSIControl.SGR.format("")
     )
@@ -0,0 +1,214 @@
+"""Class for highlighting text that already contains ANSI escape sequences."""
+
+__all__ = ("Highlighter",)
+
+import re
+from itertools import accumulate
+from typing import Dict, List, Match, Optional, Pattern, Sequence, Tuple, Union
+
+from .codes import ANSIControl
+from .styled import _EMPTY, _Style
+from .vterm import _MAX_PENDING, _PARTIAL, _parse_params
+
+_RESET = ANSIControl.SGR.format("")
+_MAX_SGRS = 1 << 12
+_SGR = re.compile(r"\x1b\[([0-?]*)m")
+# Escape sequences and stray escape characters, captured for splitting.
+_ESCAPE = re.compile(
+    r"(\x1b\[[0-?]*[ -/]*[@-~]"
+    r"|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    r"|\x1b[ -/]*[0-Z\\^-~]"
+    r"|\x1b)"
+)
+
+
+def _search(pattern: Pattern, text: str, pos: int) -> Optional[Match]:
+    # Find the next non-empty match not containing an escape sequence, each of
+    # which is replaced by ESC in the text.
+    match = pattern.search(text, pos)
+    if match is None:
+        return None
+    start, end = match.span()
+    if start != end and text.find("\x1b", start, end) == -1:
+        return match
+    size = len(text)
+    endpos = size
+    while True:
+        match = pattern.search(text, pos, endpos) if pos <= endpos else None
+        if match is None:
+            if endpos == size:
+                return None
+            # Continue after the escape sequence ending the segment.
+            pos, endpos = endpos + 1, size
+            continue
+        start, end = match.span()
+        if start == end:
+            pos = start + 1
+            continue
+        escape = text.find("\x1b", start, end)
+        if escape == -1:
+            return match
+        # Search again within the segment of text before the sequence.
+        pos, endpos = start, escape
+
+
+class Highlighter:
+    """
+    Highlighter of matches of regular expressions in a stream of text.
+
+    Escape sequences in the text are copied unchanged and are never split:
+    a sequence incomplete at the end of a chunk is held until the next chunk.
+    The style selected by the text is tracked, so that it is restored after
+    every highlighted match.  Matches are searched within the text between
+    escape sequences of a chunk, so that nothing else is buffered, with each
+    rule searched over the whole chunk at once.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[Union[str, Pattern], str]]):
+        """
+        :param rules: pairs of a regular expression and the style of its
+            matches returned by `ansiprefix`, where the earliest match is
+            highlighted and earlier rules take precedence over later ones
+            among matches at the same position
+        :raise re.error:
+        """
+        self._patterns = [re.compile(pattern) for pattern, _ in rules]
+        self._styles = [style for _, style in rules]
+        self._states: Dict[Tuple[_Style, str], _Style] = {}
+        self._restores: Dict[_Style, str] = {}
+        self.reset()
+
+    def reset(self):
+        """Discard the held text and the tracked style."""
+        self._pending = ""
+        self._state = _EMPTY
+        self._sgrs: List[str] = []
+
+    def feed(self, data: str) -> str:
+        """
+        Highlight a chunk of text.
+
+        :param data: the next chunk
+        :return: the highlighted text up to the last complete escape sequence
+        """
+        if self._pending:
+            data = self._pending + data
+            self._pending = ""
+        end = len(data)
+        partial = _PARTIAL.search(data, max(0, end - _MAX_PENDING))
+        if partial is not None:
+            end = partial.start()
+            self._pending = data[end:]
+        text = data[:end]
+        # Escape sequences are replaced by ESC, so that matches neither
+        # contain them nor depend on the characters in them.
+        pieces = _ESCAPE.split(text)
+        plain = "\x1b".join(pieces[::2]) if len(pieces) > 1 else text
+        matches = self._matches(plain)
+        if matches:
+            text = self._highlight(text, plain, pieces[1::2], matches)
+        else:
+            self._sgrs += _SGR.findall(text)
+        if len(self._sgrs) > _MAX_SGRS:
+            self._fold()
+        return text
+
+    def close(self) -> str:
+        """
+        Return the held text.
+
+        :return: the incomplete escape sequence at the end of the stream
+        """
+        res = self._pending
+        self.reset()
+        return res
+
+    def _fold(self):
+        # Apply the recorded selections after the last reset to the style.
+        sgrs = self._sgrs
+        state = self._state
+        for i in range(len(sgrs) - 1, -1, -1):
+            if sgrs[i] == "" or sgrs[i] == "0":
+                state = _EMPTY
+                sgrs = sgrs[i + 1 :]
+                break
+        for params in sgrs:
+            key = (state, params)
+            new = self._states.get(key)
+            if new is None:
+                new = state.apply(_parse_params(params))
+                if len(self._states) < _MAX_SGRS:
+                    self._states[key] = new
+            state = new
+        self._state = state
+        self._sgrs = []
+
+    def _matches(self, plain: str) -> List[Tuple[int, int, str]]:
+        # The rules are searched separately over the whole chunk, so that
+        # their groups are not renumbered, and the next match of each rule is
+        # kept until passed.
+        patterns = self._patterns
+        found = [_search(pattern, plain, 0) for pattern in patterns]
+        res = []
+        pos = 0
+        while True:
+            best = -1
+            for i, match in enumerate(found):
+                if match is not None and match.start() < pos:
+                    match = found[i] = _search(patterns[i], plain, pos)
+                if match is not None and (
+                    best < 0 or match.start() < found[best].start()
+                ):
+                    best = i
+            if best < 0:
+                return res
+            start, pos = found[best].span()
+            res.append((start, pos, self._styles[best]))
+
+    def _highlight(
+        self,
+        text: str,
+        plain: str,
+        escapes: List[str],
+        matches: List[Tuple[int, int, str]],
+    ) -> str:
+        # Offsets of matches in `plain` are mapped to `text` by the total
+        # length of the escape sequences before them.
+        ends = list(accumulate(map(len, escapes)))
+        parts = []
+        pos = 0
+        count = 0
+        counted = 0
+        restore = None
+        for start, end, style in matches:
+            count += plain.count("\x1b", counted, start)
+            counted = end
+            if count:
+                shift = ends[count - 1] - count
+                start += shift
+                end += shift
+            sgrs = _SGR.findall(text, pos, start)
+            if sgrs:
+                self._sgrs += sgrs
+                restore = None
+            if restore is None:
+                self._fold()
+                restore = self._restores.get(self._state)
+                if restore is None:
+                    restore = _RESET + (
+                        ANSIControl.SGR.format(
+                            ";".join(str(p) for p in self._state.params())
+                        )
+                        if self._state != _EMPTY
+                        else ""
+                    )
+                    if len(self._restores) < _MAX_SGRS:
+                        self._restores[self._state] = restore
+            parts.append(text[pos:start])
+            parts.append(style)
+            parts.append(text[start:end])
+            parts.append(restore)
+            pos = end
+        self._sgrs += _SGR.findall(text, pos)
+        parts.append(text[pos:])
+        return "".join(parts)
@@ -0,0 +1,172 @@
+"""Function for rendering images with ANSI escape sequences.
+
+This module requires NumPy and is not imported by the package.
+"""
+
+__all__ = ("ansiimage",)
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .codes import C1, ANSIControl, ANSIColor
+
+_HALF_BLOCK = "▀"
+_CSI = str(C1.CSI)
+_RESET = ANSIControl.SGR.format("")
+_CUBE = np.array([0, 95, 135, 175, 215, 255])
+_CUBE_BOUNDS = (_CUBE[1:] + _CUBE[:-1]) / 2
+_PALETTE = np.array(
+    [
+        (0, 0, 0),
+        (205, 0, 0),
+        (0, 205, 0),
+        (205, 205, 0),
+        (0, 0, 238),
+        (205, 0, 205),
+        (0, 205, 205),
+        (229, 229, 229),
+        (127, 127, 127),
+        (255, 0, 0),
+        (0, 255, 0),
+        (255, 255, 0),
+        (92, 92, 255),
+        (255, 0, 255),
+        (0, 255, 255),
+        (255, 255, 255),
+    ]
+)
+
+
+def _resize(image: np.ndarray, height: int, width: int) -> np.ndarray:
+    # Area averaging for downscaling and nearest neighbors for upscaling.
+    for axis, size in ((0, height), (1, width)):
+        n = image.shape[axis]
+        starts = np.arange(size) * n // size
+        counts = np.maximum(np.diff(np.append(starts, n)), 1)
+        image = np.add.reduceat(image, starts, axis=axis)
+        image /= counts.reshape((-1, 1, 1) if axis == 0 else (1, -1, 1))
+    return image
+
+
+def _quantize(pixels: np.ndarray, depth: int) -> np.ndarray:
+    if depth == 24:
+        rgb = np.rint(pixels).astype(np.int64)
+        return rgb[..., 0] << 16 | rgb[..., 1] << 8 | rgb[..., 2]
+    if depth == 8:
+        levels = np.searchsorted(_CUBE_BOUNDS, pixels)
+        cube = 16 + 36 * levels[..., 0] + 6 * levels[..., 1] + levels[..., 2]
+        cube_error = ((_CUBE[levels] - pixels) ** 2).sum(-1)
+        gray = np.clip(np.rint((pixels.mean(-1) - 8) / 10), 0, 23)
+        gray_error = ((8 + 10 * gray[..., None] - pixels) ** 2).sum(-1)
+        return np.where(gray_error < cube_error, 232 + gray, cube).astype(
+            np.int64
+        )
+    return (
+        ((pixels[..., None, :] - _PALETTE) ** 2).sum(-1).argmin(-1)
+    ).astype(np.int64)
+
+
+def _color_params(keys: np.ndarray, depth: int, offset: int) -> List[str]:
+    res = []
+    for key in keys.tolist():
+        if depth == 24:
+            res.append(
+                f"{offset + ANSIColor.SET};{ANSIColor.COLOR24};"
+                f"{key >> 16};{key >> 8 & 0xFF};{key & 0xFF}"
+            )
+        elif depth == 8:
+            res.append(f"{offset + ANSIColor.SET};{ANSIColor.COLOR8};{key}")
+        elif key < 8:
+            res.append(str(offset + key))
+        else:
+            res.append(str(offset + ANSIColor.BRIGHT + key - 8))
+    return res
+
+
+def _changes(keys: np.ndarray, depth: int, offset: int) -> Tuple[list, list]:
+    # Index of the parameters of each cell whose color differs from that of
+    # the previous cell in the row, and -1 for other cells.
+    unique, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.reshape(keys.shape)
+    changed = np.ones(keys.shape, dtype=bool)
+    changed[:, 1:] = keys[:, 1:] != keys[:, :-1]
+    return (
+        np.where(changed, inverse, -1).tolist(),
+        _color_params(unique, depth, offset),
+    )
+
+
+def ansiimage(
+    image,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    depth: int = 24,
+) -> str:
+    """
+    Render an image with half blocks colored by ANSI escape codes.
+
+    Every character cell shows two pixels: the upper one as the foreground
+    color of `▀` and the lower one as the background color.  The image is
+    resized by averaging pixels, and colors are quantized and converted to
+    escape codes for all cells at once.  Escape codes are emitted only where
+    the foreground or the background color differs from that of the previous
+    cell in the row.
+
+    If only one of `width` and `height` is given, the other is chosen to keep
+    the aspect ratio of the image, and if neither is given, the width of the
+    image is kept.
+
+    :param image: an array of shape `(H, W, 3)` with RGB colors as integers
+        between 0 and 255 or floating point numbers between 0 and 1 (further
+        channels are ignored)
+    :param width: the number of columns of cells
+    :param height: the number of rows of cells
+    :param depth: the color depth, 24 (24-bit colors), 8 (8-bit colors), or 4
+        (16 basic colors)
+    :return: the rows of cells joined by line feeds
+    :raise ValueError:
+    """
+    image = np.asarray(image)
+    if image.ndim != 3 or image.shape[2] < 3:
+        raise ValueError("an array of shape (H, W, 3) expected")
+    if image.shape[0] == 0 or image.shape[1] == 0:
+        raise ValueError("the image should not be empty")
+    if depth not in (24, 8, 4):
+        raise ValueError(f"unexpected color depth: {depth}")
+    pixels = image[..., :3].astype(np.float64)
+    if np.issubdtype(image.dtype, np.floating):
+        pixels *= 255
+    np.clip(pixels, 0, 255, out=pixels)
+    rows, columns = image.shape[:2]
+    if width is None and height is None:
+        width = columns
+    if width is None:
+        width = max(round(columns * 2 * height / rows), 1)
+    elif height is None:
+        height = max(round(rows * width / columns / 2), 1)
+    if width < 1 or height < 1:
+        raise ValueError("the size of the rendered image should be positive")
+    pixels = _resize(pixels, 2 * height, width)
+    keys = _quantize(pixels, depth)
+    fore, fore_params = _changes(keys[0::2], depth, ANSIColor.FORE)
+    back, back_params = _changes(keys[1::2], depth, ANSIColor.BACK)
+    lines = []
+    for fore_row, back_row in zip(fore, back):
+        parts = []
+        for f, b in zip(fore_row, back_row):
+            if f >= 0:
+                if b >= 0:
+                    parts.append(
+                        f"{_CSI}{fore_params[f]};{back_params[b]}m"
+                        f"{_HALF_BLOCK}"
+                    )
+                else:
+                    parts.append(f"{_CSI}{fore_params[f]}m{_HALF_BLOCK}")
+            elif b >= 0:
+                parts.append(f"{_CSI}{back_params[b]}m{_HALF_BLOCK}")
+            else:
+                parts.append(_HALF_BLOCK)
+        parts.append(_RESET)
+        lines.append("".join(parts))
+    return "\n".join(lines)
@@ -0,0 +1,165 @@
+"""Class for colorizing JSON text with ANSI escape sequences."""
+
+__all__ = ("JSON_STYLES", "JSONColorizer")
+
+import codecs
+import re
+from typing import Dict, Optional, Union
+
+from .codes import ANSIControl
+from .fmt import ansiprefix
+
+JSON_STYLES = {
+    "key": ansiprefix(fore="b"),
+    "string": ansiprefix(fore="g"),
+    "number": ansiprefix(fore="c"),
+    "boolean": ansiprefix(fore="y"),
+    "null": ansiprefix(fore="m"),
+    "punctuation": "",
+}
+
+_RESET = ANSIControl.SGR.format("")
+_KINDS = ("key", "string", "number", "boolean", "null", "punctuation")
+_STRING = r'"(?:[^"\\\n]|\\.)*"'
+_NUMBER = r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?"
+_WS = r"[ \t\r\n]*"
+# Groups are numbered after `_KINDS`.  Tokens at the end of the text that
+# may be incomplete or whose kind depends on the next characters are matched
+# by the last group.
+_TOKENS = (
+    rf"({_STRING})(?={_WS}:)"
+    rf"|({_STRING})(?!{_WS}\Z)"
+    rf"|({_NUMBER})(?![0-9.eE+\-]|\Z)"
+    r"|(true|false)"
+    r"|(null)"
+    r"|()(?!)"
+    r'|("(?:[^"\\\n]|\\.)*\\?(?:"[ \t\r\n]*)?\Z'
+    r"|(?=[-0-9])-?[0-9]*(?:\.[0-9]*)?(?:[eE][+-]?[0-9]*)?\Z"
+    r"|(?:t|tr|tru|f|fa|fal|fals|n|nu|nul)\Z)"
+)
+_TOKEN = re.compile(_TOKENS)
+_TOKEN_PUNCT = re.compile(_TOKENS.replace(r"|()(?!)", r"|([{}\[\],:])"))
+_PENDING = len(_KINDS) + 1
+_COMPLETE = re.compile(
+    rf"({_STRING})(?={_WS}:)|({_STRING})|({_NUMBER})\Z|(true|false)|(null)"
+)
+# An incomplete string longer than this is assumed to be a value and is
+# emitted, so that long strings are not scanned again with every chunk.
+_MAX_PENDING = 1024
+_OPEN_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*\\?\Z')
+_STRING_REST = re.compile(r'(?:[^"\\\n]|\\.)*')
+
+
+class JSONColorizer:
+    """
+    Colorizer of JSON text scanning the text once without parsing it.
+
+    Tokens are found by a single regular expression, in which keys are
+    distinguished from other strings by the following colon, so that no
+    state of nesting is kept.  Tokens are surrounded by the escape code of
+    their style and a reset, and all other characters are copied, so that the
+    text without escape codes is the input.  Text can be fed in chunks of any
+    size: tokens at the end of a chunk that may be incomplete are held until
+    the next chunk, except that strings longer than 1024 characters are
+    emitted as values before they end.  Invalid JSON is copied with the
+    recognized tokens colorized, which makes the colorizer suitable for
+    JSON-lines logs.
+    """
+
+    def __init__(self, styles: Optional[Dict[str, str]] = None):
+        """
+        :param styles: the styles of token kinds overriding `JSON_STYLES`,
+            each returned by `ansiprefix` (empty for no style)
+        :raise ValueError:
+        """
+        merged = dict(JSON_STYLES)
+        if styles is not None:
+            for kind, style in styles.items():
+                if kind not in JSON_STYLES:
+                    raise ValueError(f"unexpected kind of token: '{kind}'")
+                merged[kind] = style
+        self._string_style = merged["string"]
+        self._styles = ("",) + tuple(merged[kind] for kind in _KINDS)
+        self._token = _TOKEN_PUNCT if merged["punctuation"] else _TOKEN
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.reset()
+
+    def reset(self):
+        """Discard held text."""
+        self._pending = ""
+        self._open: Optional[str] = None
+        self._decoder.reset()
+
+    def feed(self, chunk: Union[str, bytes], final: bool = False) -> str:
+        """
+        Colorize a chunk of text or UTF-8 encoded bytes.
+
+        :param chunk: the next chunk
+        :param final: whether this is the last chunk
+        :return: the colorized text up to the last complete token
+        """
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = self._decoder.decode(chunk, final)
+        data = self._pending + chunk if self._pending else chunk
+        self._pending = ""
+        styles = self._styles
+        parts = []
+        if self._open is not None:
+            # Continue the string emitted before the last chunk.
+            end = _STRING_REST.match(data).end()
+            if not final and (
+                end == len(data) or end == len(data) - 1 and data[end] == "\\"
+            ):
+                # Hold only a trailing backslash.
+                self._pending = data[end:]
+                return data[:end]
+            if data[end : end + 1] == '"':
+                end += 1
+            parts.append(data[:end])
+            if self._open:
+                parts.append(_RESET)
+            self._open = None
+            data = data[end:]
+        pos = 0
+        for match in self._token.finditer(data):
+            kind = match.lastindex
+            start = match.start()
+            token = match.group()
+            if kind == _PENDING:
+                if not final:
+                    if len(token) > _MAX_PENDING and _OPEN_STRING.match(token):
+                        # Hold only a trailing backslash.
+                        end = _STRING_REST.match(token, 1).end()
+                        self._open = self._string_style
+                        parts.append(data[pos:start])
+                        parts.append(self._open)
+                        parts.append(token[:end])
+                        self._pending = token[end:]
+                        return "".join(parts)
+                    self._pending = token
+                    data = data[:start]
+                    break
+                complete = _COMPLETE.match(token)
+                if complete is None:
+                    continue
+                kind = complete.lastindex
+                token = complete.group()
+            style = styles[kind]
+            if style:
+                parts.append(data[pos:start])
+                parts.append(style)
+                parts.append(token)
+                parts.append(_RESET)
+                pos = start + len(token)
+        parts.append(data[pos:])
+        return "".join(parts)
+
+    def close(self) -> str:
+        """
+        Colorize the held text.
+
+        :return: the colorized text
+        """
+        res = self.feed(self._decoder.decode(b"", True), True)
+        self.reset()
+        return res
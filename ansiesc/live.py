@@ -0,0 +1,174 @@
+"""Class for redrawing lines at the bottom of a terminal."""
+
+__all__ = ("LiveRegion", "progress_bar")
+
+import sys
+import threading
+from collections import deque
+from typing import Optional, TextIO
+
+from .codes import ANSIControl
+
+_RESET = ANSIControl.SGR.format("")
+_CLEAR_LINE = "\r" + ANSIControl.EL.format(0)
+
+
+def progress_bar(
+    fraction: float,
+    width: int = 40,
+    fill: str = "█",
+    empty: str = " ",
+    style: str = "",
+) -> str:
+    """
+    Render a progress bar as a string of `width` characters.
+
+    :param fraction: the completed fraction (clamped to the range from 0 to 1)
+    :param width: the number of characters of the bar
+    :param fill: the character of the completed part
+    :param empty: the character of the remaining part
+    :param style: the style of the completed part returned by `ansiprefix`
+    :return: the progress bar
+    """
+    n = int(min(max(fraction, 0.0), 1.0) * width)
+    done = fill * n
+    if style and done:
+        done = style + done + _RESET
+    return done + empty * (width - n)
+
+
+class LiveRegion:
+    """
+    Lines at the bottom of a terminal redrawn at a capped frame rate.
+
+    Lines are updated with `update` and log lines are added with `print` from
+    any thread.  Both only store the new content without locking, and a
+    background thread redraws the region at most `fps` times per second.  Only
+    the lines whose content changed since the last frame are rewritten, with
+    the cursor position saved and restored around them.  Log lines are
+    printed in place of the region, which is then drawn again below them, so
+    that they scroll above the region.
+
+    The region is started by `start` or by entering a `with` block and is
+    drawn for the last time and released by `stop` or by leaving the block.
+    Lines should not contain line feeds and should fit in the width of the
+    terminal.
+    """
+
+    def __init__(
+        self, size: int, fps: float = 10.0, stream: Optional[TextIO] = None
+    ):
+        """
+        :param size: the number of lines of the region
+        :param fps: the maximum number of redraws per second
+        :param stream: the output stream (`sys.stdout` by default)
+        """
+        if size < 1:
+            raise ValueError("the size of the region should be positive")
+        if fps <= 0:
+            raise ValueError("the frame rate should be positive")
+        self._size = size
+        self._interval = 1.0 / fps
+        self._stream = stream
+        self._lines = size * [""]
+        self._drawn: Optional[list] = None
+        self._logs: deque = deque()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> str:
+        return self._lines[index]
+
+    def __setitem__(self, index: int, text: str):
+        self._lines[index] = text
+
+    def update(self, index: int, text: str):
+        """
+        Set the content of a line of the region.
+
+        :param index: the index of the line
+        :param text: the new content
+        """
+        self._lines[index] = text
+
+    def print(self, *args, sep: str = " "):
+        """
+        Print a log line above the region.
+
+        A text with line feeds is printed as several lines, so that each of
+        them is cleared before being written.
+
+        :param args: objects to print
+        :param sep: the separator between objects
+        """
+        self._logs.extend(sep.join(str(arg) for arg in args).split("\n"))
+
+    def start(self):
+        """Draw the region and start redrawing it in a background thread."""
+        if self._thread is None:
+            self._stopped.clear()
+            self.refresh()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop redrawing the region and draw it for the last time."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+        self.refresh()
+
+    def __enter__(self) -> "LiveRegion":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def refresh(self):
+        """Redraw the changed lines of the region and print pending logs."""
+        with self._lock:
+            frame = self._frame()
+            if frame:
+                stream = self._stream or sys.stdout
+                stream.write(frame)
+                stream.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            self.refresh()
+
+    def _frame(self) -> str:
+        lines = list(self._lines)
+        drawn = self._drawn
+        logs = []
+        while self._logs:
+            logs.append(self._logs.popleft())
+        self._drawn = lines
+        # The cursor is kept at the beginning of the line below the region.
+        if drawn is None:
+            return "".join(f"{log}\n" for log in logs) + "".join(
+                f"{line}\n" for line in lines
+            )
+        size = self._size
+        if logs:
+            return (
+                ANSIControl.CUU.format(size)
+                + "".join(f"{_CLEAR_LINE}{log}\n" for log in logs)
+                + "".join(f"{_CLEAR_LINE}{line}\n" for line in lines)
+            )
+        parts = [
+            ANSIControl.CUU.format(size - i) + _CLEAR_LINE + line
+            for i, line in enumerate(lines)
+            if line != drawn[i]
+        ]
+        if not parts:
+            return ""
+        return ANSIControl.SCP + "".join(
+            part + ANSIControl.RCP for part in parts
+        )
@@ -0,0 +1,271 @@
+"""Class for styling ranges of a large text with ANSI escape sequences."""
+
+__all__ = ("StyleOverlay",)
+
+import random
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from .fmt import _Color
+from .styled import _EMPTY, _Style, _render, _style
+
+_Range = Tuple[int, int, int, int, _Style]
+# A private generator, so that the sequence of the global one is unchanged.
+_random = random.Random()
+
+
+class _Node:
+    """Node of a treap of ranges ordered by start, end, and handle."""
+
+    __slots__ = ("key", "weight", "max_end", "left", "right")
+
+    def __init__(self, key: Tuple[int, int, int]):
+        self.key = key
+        self.weight = _random.random()
+        self.max_end = key[1]
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+
+    def update(self):
+        max_end = self.key[1]
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+
+def _split(
+    node: Optional[_Node], key: Tuple[int, int, int]
+) -> Tuple[Optional[_Node], Optional[_Node]]:
+    # Split into nodes with keys less than `key` and the others.
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        node.update()
+        return node, right
+    left, node.left = _split(node.left, key)
+    node.update()
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.weight > right.weight:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+def _insert(root: Optional[_Node], node: _Node) -> _Node:
+    if root is None:
+        return node
+    if node.weight > root.weight:
+        node.left, node.right = _split(root, node.key)
+        node.update()
+        return node
+    if node.key < root.key:
+        root.left = _insert(root.left, node)
+    else:
+        root.right = _insert(root.right, node)
+    root.update()
+    return root
+
+
+def _delete(
+    root: Optional[_Node], key: Tuple[int, int, int]
+) -> Optional[_Node]:
+    if root is None:
+        return None
+    if root.key == key:
+        return _merge(root.left, root.right)
+    if key < root.key:
+        root.left = _delete(root.left, key)
+    else:
+        root.right = _delete(root.right, key)
+    root.update()
+    return root
+
+
+def _overlapping(node: Optional[_Node], start: int, end: int, res: List[int]):
+    # Collect the handles of ranges overlapping the range from start to end.
+    while node is not None and node.max_end > start:
+        _overlapping(node.left, start, end, res)
+        node_start, node_end, handle = node.key
+        if node_start >= end:
+            return
+        if node_end > start:
+            res.append(handle)
+        node = node.right
+
+
+class StyleOverlay:
+    """
+    Styles of ranges of a text merged into ANSI escape codes on rendering.
+
+    Ranges are stored in an interval treap, so that adding or removing a range
+    takes logarithmic time and finding the ranges overlapping a part of the
+    text takes logarithmic time in the number of ranges plus the number of
+    ranges found.  The text is never formatted as a whole: `render` and
+    `viewport` format only the requested part.
+
+    Where ranges overlap, their styles are merged in the order of priority
+    (and of addition for equal priorities): text attributes are combined, and
+    the colors of a range override those of ranges with lower priorities.
+    """
+
+    def __init__(self, text: str):
+        """
+        :param text: the text to style
+        """
+        self._text = text
+        self._line_starts: Optional[List[int]] = None
+        self._root: Optional[_Node] = None
+        self._ranges: Dict[int, _Range] = {}
+        self._next = 0
+
+    @property
+    def text(self) -> str:
+        """The styled text."""
+        return self._text
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def add(
+        self,
+        start: int,
+        end: int,
+        attribs: str = "",
+        fore: _Color = None,
+        back: _Color = None,
+        underline: _Color = None,
+        extra_attribs: Optional[Sequence[int]] = None,
+        priority: int = 0,
+    ) -> int:
+        """
+        Style a range of the text.
+
+        The parameters after `end` and before `priority` are the same as those
+        of `ansifmt`.
+
+        :param start: the index of the first character of the range
+        :param end: the index after the last character of the range
+        :param attribs: string of characters contained in `TEXT_ATTRIBS`
+        :param fore: the foreground color
+        :param back: the background color
+        :param underline: the underline color
+        :param extra_attribs: additional attributes
+        :param priority: the priority of the style
+        :return: a handle of the range for `remove`
+        :raise ValueError:
+        """
+        if not 0 <= start <= end <= len(self._text):
+            raise ValueError(f"invalid range: {start}:{end}")
+        style = _style(attribs, fore, back, underline, extra_attribs)
+        handle = self._next
+        self._next += 1
+        self._ranges[handle] = (start, end, priority, handle, style)
+        self._root = _insert(self._root, _Node((start, end, handle)))
+        return handle
+
+    def remove(self, handle: int):
+        """
+        Remove the style of a range.
+
+        :param handle: the handle returned by `add`
+        :raise KeyError:
+        """
+        start, end, _, _, _ = self._ranges.pop(handle)
+        self._root = _delete(self._root, (start, end, handle))
+
+    def clear(self):
+        """Remove all styles."""
+        self._root = None
+        self._ranges.clear()
+
+    def overlapping(self, start: int, end: int) -> List[int]:
+        """
+        Find the ranges overlapping a part of the text.
+
+        :param start: the index of the first character of the part
+        :param end: the index after the last character of the part
+        :return: the handles of the ranges ordered by their starts
+        """
+        res: List[int] = []
+        _overlapping(self._root, start, end, res)
+        return res
+
+    def render(self, start: int = 0, end: Optional[int] = None) -> str:
+        """
+        Format a part of the text with the merged styles.
+
+        :param start: the index of the first character of the part
+        :param end: the index after the last character of the part (the end of
+            the text by default)
+        :return: the part surrounded by ANSI escape codes
+        """
+        start, end, _ = slice(start, end).indices(len(self._text))
+        if start >= end:
+            return ""
+        ranges = [self._ranges[h] for h in self.overlapping(start, end)]
+        # Sweep the boundaries of the ranges clipped to the part.
+        events: Dict[int, List[Tuple[bool, int]]] = {}
+        for range_start, range_end, _, handle, _ in ranges:
+            events.setdefault(max(range_start, start), []).append(
+                (True, handle)
+            )
+            events.setdefault(min(range_end, end), []).append((False, handle))
+        styles: Dict[FrozenSet[int], _Style] = {frozenset(): _EMPTY}
+        active: set = set()
+        runs = []
+        pos = start
+        for offset in sorted(events):
+            if offset > pos:
+                key = frozenset(active)
+                if key not in styles:
+                    style = _EMPTY
+                    for handle in sorted(
+                        key, key=lambda h: (self._ranges[h][2], h)
+                    ):
+                        style = style.merge(self._ranges[handle][4])
+                    styles[key] = style
+                runs.append((self._text[pos:offset], styles[key]))
+                pos = offset
+            for begins, handle in events[offset]:
+                if begins:
+                    active.add(handle)
+                else:
+                    active.discard(handle)
+        if pos < end:
+            runs.append((self._text[pos:end], _EMPTY))
+        return _render(runs)
+
+    def viewport(self, line: int, count: int) -> List[str]:
+        """
+        Format lines of the text with the merged styles.
+
+        :param line: the index of the first line
+        :param count: the maximum number of lines
+        :return: the formatted lines without line feeds
+        """
+        if self._line_starts is None:
+            starts = [0]
+            find = self._text.find
+            i = find("\n")
+            while i != -1:
+                starts.append(i + 1)
+                i = find("\n", i + 1)
+            self._line_starts = starts
+        starts = self._line_starts
+        res = []
+        for i in range(line, min(line + count, len(starts))):
+            end = starts[i + 1] - 1 if i + 1 < len(starts) else len(self._text)
+            res.append(self.render(starts[i], end))
+        return res
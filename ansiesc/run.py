@@ -0,0 +1,221 @@
+"""Functions for highlighting the output of a command run in a pseudoterminal.
+
+This module requires a POSIX system and is not imported by the package.
+"""
+
+__all__ = ("DEFAULT_RULES", "run", "benchmark")
+
+import codecs
+import fcntl
+import os
+import pty
+import select
+import signal
+import struct
+import termios
+import time
+import tty
+from typing import Dict, List, Optional, Sequence
+
+from .fmt import ansifmt, ansiprefix
+from .highlight import Highlighter
+
+DEFAULT_RULES = (
+    # The lookaheads let the search skip other characters quickly.
+    (
+        r"(?i)(?=[ef])\b(?:error|fatal|fail(?:ed|ure)?)\b",
+        ansiprefix("*", "r"),
+    ),
+    (r"(?i)(?=w)\bwarn(?:ing)?\b", ansiprefix("*", "y")),
+)
+
+_READ_SIZE = 1 << 16
+
+
+def _write_all(fd: int, data: bytes):
+    while data:
+        try:
+            data = data[os.write(fd, data) :]
+        except BlockingIOError:
+            select.select([], [fd], [])
+
+
+def _copy_window_size(src: int, dst: int):
+    try:
+        size = fcntl.ioctl(
+            src, termios.TIOCGWINSZ, struct.pack("HHHH", 0, 0, 0, 0)
+        )
+        fcntl.ioctl(dst, termios.TIOCSWINSZ, size)
+    except OSError:
+        pass
+
+
+def _exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def run(
+    args: Sequence[str],
+    highlighter: Optional[Highlighter] = None,
+    stdin: int = 0,
+    stdout: int = 1,
+) -> int:
+    """
+    Run a command in a pseudoterminal and highlight its output.
+
+    The command sees a terminal, so that it keeps its own colors and its
+    output is not buffered by lines.  The output is read without blocking
+    as soon as it is available, highlighted, and written immediately.
+    Input is forwarded to the command, with the terminal of `stdin` switched
+    to raw mode, and its window size is propagated to the pseudoterminal.
+
+    :param args: the command and its arguments
+    :param highlighter: the highlighter of the output (`DEFAULT_RULES` by
+        default)
+    :param stdin: the file descriptor of the input
+    :param stdout: the file descriptor of the output
+    :return: the exit status of the command, or the negated number of the
+        signal that terminated it
+    """
+    if highlighter is None:
+        highlighter = Highlighter(DEFAULT_RULES)
+    pid, master = pty.fork()
+    if pid == 0:
+        try:
+            os.execvp(args[0], list(args))
+        except OSError as exc:
+            os.write(2, f"{args[0]}: {exc.strerror}\n".encode())
+        finally:
+            os._exit(127)
+    is_tty = os.isatty(stdin)
+    mode = None
+    handler = None
+    if is_tty:
+        _copy_window_size(stdin, master)
+        mode = termios.tcgetattr(stdin)
+        tty.setraw(stdin)
+        handler = signal.signal(
+            signal.SIGWINCH, lambda *_: _copy_window_size(stdin, master)
+        )
+    os.set_blocking(master, False)
+    decoder = codecs.getincrementaldecoder("utf-8")("surrogateescape")
+    fds = [master, stdin]
+    try:
+        while True:
+            try:
+                ready, _, _ = select.select(fds, [], [])
+            except InterruptedError:
+                continue
+            if master in ready:
+                try:
+                    data = os.read(master, _READ_SIZE)
+                except BlockingIOError:
+                    data = None
+                except OSError:
+                    data = b""
+                if data == b"":
+                    break
+                if data:
+                    _write_all(
+                        stdout,
+                        highlighter.feed(decoder.decode(data)).encode(
+                            "utf-8", "surrogateescape"
+                        ),
+                    )
+            if stdin in ready:
+                data = os.read(stdin, _READ_SIZE)
+                if data:
+                    _write_all(master, data)
+                else:
+                    fds.remove(stdin)
+                    if not is_tty:
+                        _write_all(master, b"\x04")
+        _write_all(
+            stdout,
+            (
+                highlighter.feed(decoder.decode(b"", True))
+                + highlighter.close()
+            ).encode("utf-8", "surrogateescape"),
+        )
+    finally:
+        if mode is not None:
+            termios.tcsetattr(stdin, termios.TCSAFLUSH, mode)
+        if handler is not None:
+            signal.signal(signal.SIGWINCH, handler)
+        os.close(master)
+    _, status = os.waitpid(pid, 0)
+    return _exit_code(status)
+
+
+def benchmark(
+    chunks: int = 2000,
+    size: int = 1024,
+    highlighter: Optional[Highlighter] = None,
+) -> Dict[str, float]:
+    """
+    Measure the latency added by highlighting to copying from a pseudoterminal.
+
+    Chunks of colored log lines are written to a pseudoterminal in raw mode
+    and copied from it to `/dev/null`, once directly and once decoded,
+    highlighted, and encoded as in `run`.  The time from the return of each
+    read to the completion of the corresponding write is measured.
+
+    :param chunks: the number of chunks
+    :param size: the approximate size of a chunk in bytes
+    :param highlighter: the highlighter (`DEFAULT_RULES` by default)
+    :return: the mean and the 99th percentile of the latencies of plain
+        copies and highlighted copies in microseconds and the added mean
+        latency
+    """
+    if highlighter is None:
+        highlighter = Highlighter(DEFAULT_RULES)
+    line = (
+        ansifmt("12:00:00", fore="c")
+        + " worker: processed item, no error "
+        + ansifmt("ok", "*", "g")
+        + "\r\n"
+    ).encode()
+    chunk = line * max(size // len(line), 1)
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    sink = os.open(os.devnull, os.O_WRONLY)
+    res = {}
+    try:
+        # The chunks are written without blocking, so that chunks larger than
+        # the buffer of the pseudoterminal are written between reads.
+        os.set_blocking(slave, False)
+        for name in ("plain", "highlighted"):
+            decoder = codecs.getincrementaldecoder("utf-8")("surrogateescape")
+            latencies: List[float] = []
+            remaining = chunks * len(chunk)
+            unwritten = chunks
+            pending = b""
+            while remaining > 0:
+                if not pending and unwritten:
+                    pending = chunk
+                    unwritten -= 1
+                if pending:
+                    try:
+                        pending = pending[os.write(slave, pending) :]
+                    except BlockingIOError:
+                        pass
+                data = os.read(master, _READ_SIZE)
+                remaining -= len(data)
+                start = time.perf_counter()
+                if name == "highlighted":
+                    data = highlighter.feed(decoder.decode(data)).encode(
+                        "utf-8", "surrogateescape"
+                    )
+                _write_all(sink, data)
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            res[f"{name}_mean"] = 1e6 * sum(latencies) / len(latencies)
+            res[f"{name}_p99"] = 1e6 * latencies[int(0.99 * len(latencies))]
+    finally:
+        os.close(sink)
+        os.close(slave)
+        os.close(master)
+    res["added_mean"] = res["highlighted_mean"] - res["plain_mean"]
+    return res
@@ -0,0 +1,348 @@
+"""Class for text with runs of styles rendered with ANSI escape sequences."""
+
+__all__ = ("StyledText",)
+
+from bisect import bisect_right
+from functools import lru_cache
+from typing import (
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .codes import ANSIControl, ANSIText, ANSIColor
+from .fmt import _Color, _sgr_params
+
+# Attributes grouped by the code that turns them off.
+_OFF_CODES = {
+    ANSIText.NORMAL_INTENSITY: (ANSIText.BOLD, ANSIText.FAINT),
+    ANSIText.NOT_CURSIVE: (ANSIText.CURSIVE, ANSIText.BLACKLETTER),
+    ANSIText.NOT_UNDERLINE: (ANSIText.UNDERLINE, ANSIText.DOUBLE_UNDERLINE),
+    ANSIText.NOT_BLINK: (ANSIText.BLINK, ANSIText.FAST_BLINK),
+    ANSIText.NOT_INVERT: (ANSIText.INVERT,),
+    ANSIText.NOT_HIDE: (ANSIText.HIDE,),
+    ANSIText.NOT_STRIKETHROUGH: (ANSIText.STRIKETHROUGH,),
+    ANSIText.DEFAULT_FONT: tuple(range(11, 20)),
+    ANSIText.NOT_PROPORTIONAL_SPACE: (ANSIText.PROPORTIONAL_SPACE,),
+    ANSIText.NOT_FRAME: (ANSIText.FRAME, ANSIText.ENCIRCLE),
+    ANSIText.NOT_OVERLINE: (ANSIText.OVERLINE,),
+    ANSIText.NOT_IDEOGRAM: tuple(range(60, 65)),
+    ANSIText.NOT_SCRIPT: (ANSIText.SUPERSCRIPT, ANSIText.SUBSCRIPT),
+}
+_OFF_CODE = {
+    int(code): int(off) for off, codes in _OFF_CODES.items() for code in codes
+}
+_FORE = ANSIColor.FORE
+_BACK = ANSIColor.BACK
+_UNDERLINE = ANSIColor.UNDERLINE
+_BRIGHT = ANSIColor.BRIGHT
+_SET = ANSIColor.SET
+_DEFAULT = ANSIColor.DEFAULT
+_COLOR8 = ANSIColor.COLOR8
+_COLOR24 = ANSIColor.COLOR24
+_ColorParams = Optional[Tuple[int, ...]]
+
+
+class _Style(NamedTuple):
+    """State of the graphics mode of a terminal."""
+
+    attribs: FrozenSet[int] = frozenset()
+    fore: _ColorParams = None
+    back: _ColorParams = None
+    underline: _ColorParams = None
+
+    def params(self) -> List[int]:
+        res = sorted(self.attribs)
+        for color in (self.fore, self.back, self.underline):
+            if color is not None:
+                res += color
+        return res
+
+    def apply(self, params: Sequence[int]) -> "_Style":
+        """Return the state after selecting graphic rendition."""
+        attribs = set(self.attribs)
+        colors = [self.fore, self.back, self.underline]
+        n = len(params)
+        if n == 0:
+            return _EMPTY
+        i = 0
+        while i < n:
+            p = params[i]
+            i += 1
+            if p == ANSIText.RESET:
+                attribs.clear()
+                colors = [None, None, None]
+            elif p in _OFF_CODES:
+                attribs.difference_update(_OFF_CODES[p])
+            elif (
+                _FORE <= p < _UNDERLINE
+                or _BRIGHT + _FORE <= p < _BRIGHT + _UNDERLINE
+                or p in (_UNDERLINE + _SET, _UNDERLINE + _DEFAULT)
+            ):
+                j = (p % _BRIGHT - _FORE) // 10
+                k = p % 10
+                if k == _SET:
+                    if i + 1 < n and params[i] == _COLOR8:
+                        colors[j] = (p, _COLOR8, params[i + 1])
+                        i += 2
+                    elif i + 3 < n and params[i] == _COLOR24:
+                        colors[j] = (p, _COLOR24, *params[i + 1 : i + 4])
+                        i += 4
+                    else:
+                        break
+                elif k == _DEFAULT:
+                    colors[j] = None
+                else:
+                    colors[j] = (p,)
+            else:
+                attribs.add(p)
+        return _Style(frozenset(attribs), *colors)
+
+    def merge(self, inner: "_Style") -> "_Style":
+        """Return the state of a span nested in a span of this state."""
+        return _Style(
+            self.attribs | inner.attribs,
+            self.fore if inner.fore is None else inner.fore,
+            self.back if inner.back is None else inner.back,
+            self.underline if inner.underline is None else inner.underline,
+        )
+
+    def transition(self, other: "_Style") -> str:
+        """Return the shortest escape code changing this state to `other`."""
+        if self == other:
+            return ""
+        if other == _EMPTY:
+            return ANSIControl.SGR.format("")
+        full = ANSIControl.SGR.format(
+            ";".join(str(p) for p in [ANSIText.RESET] + other.params())
+        )
+        params = []
+        offs = set()
+        for code in self.attribs - other.attribs:
+            if code not in _OFF_CODE:
+                return full
+            offs.add(_OFF_CODE[code])
+        params += sorted(offs)
+        params += sorted(
+            code
+            for code in other.attribs
+            if code not in self.attribs or _OFF_CODE.get(code) in offs
+        )
+        for old, new, offset in zip(
+            (self.fore, self.back, self.underline),
+            (other.fore, other.back, other.underline),
+            (_FORE, _BACK, _UNDERLINE),
+        ):
+            if old != new:
+                if new is None:
+                    params.append(offset + _DEFAULT)
+                else:
+                    params += new
+        partial = ANSIControl.SGR.format(";".join(str(p) for p in params))
+        return partial if len(partial) < len(full) else full
+
+
+_EMPTY = _Style()
+
+
+def _typed(arg):
+    # Distinguish arguments that are equal but formatted differently, such as
+    # the colors 1 and 1.0.
+    if isinstance(arg, (tuple, list)):
+        return type(arg), tuple(_typed(item) for item in arg)
+    return type(arg), arg
+
+
+@lru_cache(maxsize=256)
+def _cached_style(key, *args) -> _Style:
+    return _EMPTY.apply(_sgr_params(*args))
+
+
+def _style(*args) -> _Style:
+    try:
+        return _cached_style(_typed(args), *args)
+    except TypeError:
+        return _EMPTY.apply(_sgr_params(*args))
+
+
+def _render(runs: Iterable[Tuple[str, _Style]]) -> str:
+    parts = []
+    state = _EMPTY
+    for text, style in runs:
+        parts.append(state.transition(style))
+        parts.append(text)
+        state = style
+    parts.append(state.transition(_EMPTY))
+    return "".join(parts)
+
+
+class StyledText:
+    """
+    Text consisting of runs of characters in the same style.
+
+    The characters and the styles of runs are stored separately and are
+    rendered to a string with ANSI escape codes only when converted by `str`.
+    The rendering selects the fewest attributes changing the style of a run to
+    that of the next one and is cached until the text changes.
+
+    Styled texts nest: styling a styled text applies the new style to the runs
+    in which the inner style does not override it, e.g. in
+    `StyledText("a" + StyledText("b", fore="r") + "c", "*")` all characters
+    are bold and "b" is red.
+
+    `append` and `+=` extend the text in place in amortized constant time, and
+    `+` returns a new text.  Indices and slices refer to the visible
+    characters.
+    """
+
+    __slots__ = ("_texts", "_styles", "_ends", "_rendered")
+
+    def __init__(
+        self,
+        text: Union[str, "StyledText"] = "",
+        attribs: str = "",
+        fore: _Color = None,
+        back: _Color = None,
+        underline: _Color = None,
+        extra_attribs: Optional[Sequence[int]] = None,
+    ):
+        """
+        The parameters after `text` are the same as those of `ansifmt`.
+
+        :param text: a string or a styled text to style
+        :param attribs: string of characters contained in `TEXT_ATTRIBS`
+        :param fore: the foreground color
+        :param back: the background color
+        :param underline: the underline color
+        :param extra_attribs: additional attributes
+        :raise ValueError:
+        """
+        self._texts: List[str] = []
+        self._styles: List[_Style] = []
+        self._ends: List[int] = []
+        self._rendered: Optional[str] = None
+        self.append(text, attribs, fore, back, underline, extra_attribs)
+
+    @classmethod
+    def _from_runs(cls, runs: Iterable[Tuple[str, _Style]]) -> "StyledText":
+        self = cls()
+        for text, style in runs:
+            self._append(text, style)
+        return self
+
+    def _append(self, text: str, style: _Style):
+        if text:
+            self._texts.append(text)
+            self._styles.append(style)
+            self._ends.append(
+                (self._ends[-1] if self._ends else 0) + len(text)
+            )
+            self._rendered = None
+
+    def _runs(self) -> Iterator[Tuple[str, _Style]]:
+        return zip(self._texts, self._styles)
+
+    def _merged_runs(self) -> Iterator[Tuple[str, _Style]]:
+        texts: List[str] = []
+        last = None
+        for text, style in self._runs():
+            if style != last and texts:
+                yield "".join(texts), last
+                texts = []
+            texts.append(text)
+            last = style
+        if texts:
+            yield "".join(texts), last
+
+    def append(
+        self,
+        text: Union[str, "StyledText"],
+        attribs: str = "",
+        fore: _Color = None,
+        back: _Color = None,
+        underline: _Color = None,
+        extra_attribs: Optional[Sequence[int]] = None,
+    ) -> "StyledText":
+        """
+        Append a string or a styled text in place.
+
+        The parameters after `text` are the same as those of `ansifmt`.
+
+        :return: this styled text
+        :raise ValueError:
+        """
+        style = _style(attribs, fore, back, underline, extra_attribs)
+        if isinstance(text, StyledText):
+            for run, inner in list(text._runs()):
+                self._append(run, style.merge(inner))
+        else:
+            self._append(str(text), style)
+        return self
+
+    @property
+    def plain(self) -> str:
+        """The text without styles."""
+        return "".join(self._texts)
+
+    def __len__(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def __str__(self) -> str:
+        if self._rendered is None:
+            self._rendered = _render(self._merged_runs())
+        return self._rendered
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({str(self)!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, StyledText):
+            return NotImplemented
+        return list(self._merged_runs()) == list(other._merged_runs())
+
+    __hash__ = None
+
+    def __add__(self, other: Union[str, "StyledText"]) -> "StyledText":
+        if not isinstance(other, (str, StyledText)):
+            return NotImplemented
+        return StyledText._from_runs(self._runs()).append(other)
+
+    def __radd__(self, other: str) -> "StyledText":
+        if not isinstance(other, str):
+            return NotImplemented
+        return StyledText(other).append(self)
+
+    def __iadd__(self, other: Union[str, "StyledText"]) -> "StyledText":
+        if not isinstance(other, (str, StyledText)):
+            return NotImplemented
+        return self.append(other)
+
+    def __getitem__(self, index: Union[int, slice]) -> "StyledText":
+        n = len(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(n)
+            if step != 1:
+                raise ValueError("slice step should be 1")
+        else:
+            if index < 0:
+                index += n
+            if not 0 <= index < n:
+                raise IndexError("styled text index out of range")
+            start, stop = index, index + 1
+        res = StyledText()
+        i = bisect_right(self._ends, start)
+        while start < stop:
+            begin = self._ends[i] - len(self._texts[i])
+            end = min(self._ends[i], stop)
+            res._append(
+                self._texts[i][start - begin : end - begin], self._styles[i]
+            )
+            start = end
+            i += 1
+        return res
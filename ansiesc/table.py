@@ -0,0 +1,225 @@
+"""Functions for rendering tables of cells formatted with ANSI escape
+sequences."""
+
+__all__ = ("ansitable", "ansitable_iter")
+
+from functools import lru_cache
+from itertools import chain, islice
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from unicodedata import combining, east_asian_width
+
+from .codes import ANSIControl
+
+_RESET = ANSIControl.SGR.format("")
+_ALIGNS = "<>^"
+_Styles = Optional[Sequence[Optional[str]]]
+_CellStyle = Optional[Callable[[int, int, Any], Optional[str]]]
+
+
+@lru_cache(maxsize=1 << 16)
+def _wide_width(text: str) -> int:
+    width = 0
+    for c in text:
+        if not combining(c):
+            width += 2 if east_asian_width(c) in "WF" else 1
+    return width
+
+
+def _width(text: str) -> int:
+    return len(text) if text.isascii() else _wide_width(text)
+
+
+def _truncate(text: str, width: int) -> Tuple[str, int]:
+    if text.isascii():
+        text = text[:width]
+        return text, len(text)
+    res = 0
+    for i, c in enumerate(text):
+        if not combining(c):
+            w = 2 if east_asian_width(c) in "WF" else 1
+            if res + w > width:
+                return text[:i], res
+            res += w
+    return text, res
+
+
+def _aligns(align: str, n: int) -> str:
+    if len(align) == 1:
+        align *= n
+    elif len(align) < n:
+        align += (n - len(align)) * "<"
+    for c in align:
+        if c not in _ALIGNS:
+            raise ValueError(f"unexpected character in alignment: '{c}'")
+    return align
+
+
+def _prefixes(styles: _Styles, n: int) -> List[Optional[str]]:
+    prefixes = list(styles) if styles is not None else []
+    if len(prefixes) < n:
+        prefixes += (n - len(prefixes)) * [None]
+    return prefixes
+
+
+def _measure(row: Iterable[Any]) -> Tuple[List[Any], List[str], List[int]]:
+    values = list(row)
+    texts = [str(value) for value in values]
+    return values, texts, [_width(text) for text in texts]
+
+
+def _widths(
+    measured: Iterable[Tuple[List[Any], List[str], List[int]]],
+) -> List[int]:
+    widths: List[int] = []
+    for _, _, sizes in measured:
+        for j, size in enumerate(sizes):
+            if j < len(widths):
+                if size > widths[j]:
+                    widths[j] = size
+            else:
+                widths.append(size)
+    return widths
+
+
+def _render_row(
+    index: int,
+    values: List[Any],
+    texts: List[str],
+    sizes: List[int],
+    widths: List[int],
+    prefixes: List[Optional[str]],
+    aligns: str,
+    sep: str,
+    cell_style: _CellStyle,
+) -> str:
+    parts = []
+    for j, width in enumerate(widths):
+        if j < len(texts):
+            text = texts[j]
+            pad = width - sizes[j]
+            prefix = prefixes[j]
+            if cell_style is not None:
+                style = cell_style(index, j, values[j])
+                if style is not None:
+                    prefix = style
+            if prefix and text:
+                text = prefix + text + _RESET
+        else:
+            text = ""
+            pad = width
+        if pad > 0:
+            align = aligns[j]
+            if align == "<":
+                text += " " * pad
+            elif align == ">":
+                text = " " * pad + text
+            else:
+                left = pad // 2
+                text = " " * left + text + " " * (pad - left)
+        parts.append(text)
+    return sep.join(parts)
+
+
+def ansitable(
+    rows: Iterable[Iterable[Any]],
+    styles: _Styles = None,
+    align: str = "<",
+    sep: str = " ",
+    cell_style: _CellStyle = None,
+) -> str:
+    """
+    Render a table of values with columns padded to the widest cell.
+
+    All rows are converted to strings and measured in one pass before
+    rendering, and the measured widths are reused for padding.  Widths of
+    strings containing non-ASCII characters account for wide and combining
+    characters and are cached across calls.
+
+    Styles are ANSI escape codes returned by `ansiprefix`, which are placed
+    before the text of a cell and followed by a reset.  Padding is not
+    styled.
+
+    :param rows: an iterable of rows, each an iterable of values
+    :param styles: the style of each column (`None` for no style)
+    :param align: a character from `<`, `>`, or `^` for each column (a single
+        character applies to all columns)
+    :param sep: the separator between columns
+    :param cell_style: a function of the row index, the column index, and the
+        value of a cell returning the style overriding that of the column or
+        `None`
+    :return: the lines of the table joined by line feeds
+    :raise ValueError:
+    """
+    measured = [_measure(row) for row in rows]
+    widths = _widths(measured)
+    n = len(widths)
+    prefixes = _prefixes(styles, n)
+    aligns = _aligns(align, n)
+    return "\n".join(
+        _render_row(
+            i, values, texts, sizes, widths, prefixes, aligns, sep, cell_style
+        )
+        for i, (values, texts, sizes) in enumerate(measured)
+    )
+
+
+def ansitable_iter(
+    rows: Iterable[Iterable[Any]],
+    widths: Optional[Sequence[int]] = None,
+    sample: int = 100,
+    styles: _Styles = None,
+    align: str = "<",
+    sep: str = " ",
+    cell_style: _CellStyle = None,
+) -> Iterator[str]:
+    """
+    Render a table of values with fixed column widths line by line.
+
+    Unless `widths` is given, the widths of the columns are decided from the
+    first `sample` rows, so that only those rows are held in memory.  Cells
+    wider than their column are truncated and extra cells are dropped.  The
+    other parameters are the same as those of `ansitable`.
+
+    :param rows: an iterable of rows, each an iterable of values
+    :param widths: the width of each column
+    :param sample: the number of rows to measure if `widths` is not given
+    :param styles: the style of each column (`None` for no style)
+    :param align: a character from `<`, `>`, or `^` for each column (a single
+        character applies to all columns)
+    :param sep: the separator between columns
+    :param cell_style: a function of the row index, the column index, and the
+        value of a cell returning the style overriding that of the column or
+        `None`
+    :return: an iterator over the lines of the table
+    :raise ValueError:
+    """
+    rows = iter(rows)
+    head = []
+    if widths is None:
+        head = [_measure(row) for row in islice(rows, sample)]
+        widths = _widths(head)
+    else:
+        widths = list(widths)
+    n = len(widths)
+    prefixes = _prefixes(styles, n)
+    aligns = _aligns(align, n)
+    for i, (values, texts, sizes) in enumerate(
+        chain(head, (_measure(row) for row in rows))
+    ):
+        if len(texts) > n:
+            del values[n:], texts[n:], sizes[n:]
+        for j, size in enumerate(sizes):
+            if size > widths[j]:
+                texts[j], sizes[j] = _truncate(texts[j], widths[j])
+        yield _render_row(
+            i, values, texts, sizes, widths, prefixes, aligns, sep, cell_style
+        )
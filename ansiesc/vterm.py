@@ -0,0 +1,443 @@
+"""Class for emulating a terminal displaying text with ANSI escape sequences."""
+
+__all__ = ("VirtualTerminal",)
+
+import codecs
+import re
+from array import array
+from collections import deque
+from itertools import groupby
+from typing import Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+from .codes import ANSIText, ANSIColor
+from .styled import _OFF_CODES, _Style
+
+_CHAR = "I" if array("I").itemsize == 4 else "L"
+_ATTR = "Q"
+_ENCODING = "utf-32-le"
+# Lone surrogates, such as those decoded with `surrogateescape`, are kept.
+_ERRORS = "surrogatepass"
+_TOKEN = re.compile(
+    r"\x1b\[([0-9;]*)m([^\x00-\x1f\x7f]*)"
+    r"|([^\x00-\x1f\x7f]+)"
+    r"|\x1b\[([0-?]*)([ -/]*)([@-~])"
+    r"|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    r"|\x1b[ -/]*[0-Z\\^-~]"
+    r"|[\x00-\x1f\x7f]"
+)
+_PARTIAL = re.compile(r"\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[ -/]*)\Z")
+_MAX_PENDING = 1 << 12
+
+# Packed attributes: flags of text attributes in the lowest bits followed by
+# the foreground and the background color.  A color is 0 (default),
+# `_INDEXED | index` (8-bit color), or `_RGB | rgb` (24-bit color).
+_FLAGS = (
+    ANSIText.BOLD,
+    ANSIText.FAINT,
+    ANSIText.CURSIVE,
+    ANSIText.UNDERLINE,
+    ANSIText.BLINK,
+    ANSIText.FAST_BLINK,
+    ANSIText.INVERT,
+    ANSIText.HIDE,
+    ANSIText.STRIKETHROUGH,
+    ANSIText.BLACKLETTER,
+    ANSIText.DOUBLE_UNDERLINE,
+    ANSIText.OVERLINE,
+)
+_FLAG = {int(code): 1 << i for i, code in enumerate(_FLAGS)}
+_FLAGS_MASK = (1 << len(_FLAGS)) - 1
+_OFF_MASK = {
+    int(off): sum(_FLAG.get(code, 0) for code in codes)
+    for off, codes in _OFF_CODES.items()
+}
+_COLOR_BITS = 26
+_COLOR_MASK = (1 << _COLOR_BITS) - 1
+_FORE_SHIFT = len(_FLAGS)
+_BACK_SHIFT = _FORE_SHIFT + _COLOR_BITS
+_INDEXED = 1 << 24
+_RGB = 2 << 24
+
+
+def _apply_sgr(attr: int, params: Sequence[int]) -> int:
+    if not params:
+        return 0
+    n = len(params)
+    i = 0
+    while i < n:
+        p = params[i]
+        i += 1
+        if p == ANSIText.RESET:
+            attr = 0
+        elif p in _FLAG:
+            attr |= _FLAG[p]
+        elif p in _OFF_MASK:
+            attr &= ~_OFF_MASK[p]
+        elif 30 <= p < 50 or 90 <= p < 108:
+            shift = _FORE_SHIFT if p % 60 < 40 else _BACK_SHIFT
+            k = p % 10
+            if k == ANSIColor.SET:
+                if i + 1 < n and params[i] == ANSIColor.COLOR8:
+                    color = _INDEXED | params[i + 1] & 0xFF
+                    i += 2
+                elif i + 3 < n and params[i] == ANSIColor.COLOR24:
+                    r, g, b = params[i + 1 : i + 4]
+                    color = (
+                        _RGB | (r & 0xFF) << 16 | (g & 0xFF) << 8 | b & 0xFF
+                    )
+                    i += 4
+                else:
+                    break
+            elif k == ANSIColor.DEFAULT:
+                color = 0
+            else:
+                color = _INDEXED | (k + 8 if p >= 90 else k)
+            attr = attr & ~(_COLOR_MASK << shift) | color << shift
+        elif p == 58 and i < n:
+            # The underline color is not stored.
+            i += 2 if params[i] == ANSIColor.COLOR8 else 4
+    return attr
+
+
+def _color_params(color: int, offset: int) -> Optional[Tuple[int, ...]]:
+    if not color:
+        return None
+    value = color & 0xFFFFFF
+    if color & _RGB:
+        return (
+            offset + ANSIColor.SET,
+            ANSIColor.COLOR24,
+            value >> 16,
+            value >> 8 & 0xFF,
+            value & 0xFF,
+        )
+    if value < 8:
+        return (offset + value,)
+    if value < 16:
+        return (offset + ANSIColor.BRIGHT + value - 8,)
+    return (offset + ANSIColor.SET, ANSIColor.COLOR8, value)
+
+
+def _unpack(attr: int) -> _Style:
+    return _Style(
+        frozenset(
+            code for code, flag in _FLAG.items() if attr & flag & _FLAGS_MASK
+        ),
+        _color_params(attr >> _FORE_SHIFT & _COLOR_MASK, ANSIColor.FORE),
+        _color_params(attr >> _BACK_SHIFT & _COLOR_MASK, ANSIColor.BACK),
+    )
+
+
+class VirtualTerminal:
+    """
+    In-memory terminal consuming text with ANSI escape sequences.
+
+    The screen is a list of rows, each an array of code points and an array of
+    packed attributes, so that there is no object per cell.  Rows scrolled
+    off the top of the screen are moved to the scrollback without copying.
+
+    Printable characters, the control characters BS, TAB, LF, and CR, and the
+    escape sequences of `ANSIControl` (as well as CNL, CPL, CHA, and VPA) are
+    interpreted.  Other sequences are consumed and ignored.  Every code point
+    occupies one cell and the underline color is not stored.
+    """
+
+    def __init__(
+        self,
+        columns: int = 80,
+        rows: int = 24,
+        scrollback: Optional[int] = 1000,
+        crlf: bool = True,
+    ):
+        """
+        :param columns: the width of the screen
+        :param rows: the height of the screen
+        :param scrollback: the maximum number of rows in the scrollback
+            (`None` for no limit)
+        :param crlf: whether a line feed also returns the carriage
+        """
+        if columns < 1 or rows < 1:
+            raise ValueError("the size of the screen should be positive")
+        self._columns = columns
+        self._rows = rows
+        self._crlf = crlf
+        self._blank_chars = array(_CHAR, b" \0\0\0" * columns)
+        self._blank_attrs = array(_ATTR, [0]) * columns
+        self._scrollback: Deque[Tuple[array, array]] = deque(maxlen=scrollback)
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self._sgr_cache: Dict[Tuple[int, str], int] = {}
+        self.reset()
+
+    def reset(self):
+        """Clear the screen and the scrollback and reset the state."""
+        self._reset_screen()
+        self._pending = ""
+        self._decoder.reset()
+
+    def _reset_screen(self):
+        # The held input is kept, so that ESC c can be handled within write.
+        self._chars = [
+            array(_CHAR, self._blank_chars) for _ in range(self._rows)
+        ]
+        self._attrs = [
+            array(_ATTR, self._blank_attrs) for _ in range(self._rows)
+        ]
+        self._scrollback.clear()
+        self._x = 0
+        self._y = 0
+        self._attr = 0
+        self._saved = (0, 0)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """The number of columns and rows of the screen."""
+        return self._columns, self._rows
+
+    @property
+    def cursor(self) -> Tuple[int, int]:
+        """The zero-based column and row of the cursor."""
+        return min(self._x, self._columns - 1), self._y
+
+    def write(self, data: Union[str, bytes]):
+        """
+        Consume text or UTF-8 encoded bytes.
+
+        Escape sequences split across calls are held until they are complete.
+        Lone surrogates in text are stored like other characters.
+
+        :param data: the text or bytes to consume
+        """
+        if isinstance(data, (bytes, bytearray)):
+            data = self._decoder.decode(data)
+        if self._pending:
+            data = self._pending + data
+            self._pending = ""
+        end = len(data)
+        partial = _PARTIAL.search(data, max(0, end - _MAX_PENDING))
+        if partial is not None:
+            end = partial.start()
+            self._pending = data[end:]
+        columns = self._columns
+        sgr_cache = self._sgr_cache
+        for match in _TOKEN.finditer(data, 0, end):
+            sgr, text, plain, params, inter, final = match.groups()
+            if sgr is not None:
+                key = (self._attr, sgr)
+                attr = sgr_cache.get(key)
+                if attr is None:
+                    attr = _apply_sgr(self._attr, _parse_params(sgr))
+                    if len(sgr_cache) < 1 << 12:
+                        sgr_cache[key] = attr
+                self._attr = attr
+                if not text:
+                    continue
+            elif plain is not None:
+                text = plain
+            elif final is not None:
+                if not inter:
+                    self._csi(params, final)
+                continue
+            else:
+                self._control(match.group())
+                continue
+            x = self._x
+            size = len(text)
+            if x + size <= columns:
+                # Fast path for text fitting in the current row.
+                y = self._y
+                self._chars[y][x : x + size] = array(
+                    _CHAR, text.encode(_ENCODING, _ERRORS)
+                )
+                self._attrs[y][x : x + size] = (
+                    array(_ATTR, [self._attr]) * size
+                )
+                self._x = x + size
+            else:
+                self._print(text)
+
+    def _print(self, text: str):
+        columns = self._columns
+        data = text.encode(_ENCODING, _ERRORS)
+        size = len(text)
+        i = 0
+        while i < size:
+            if self._x >= columns:
+                self._x = 0
+                self._line_feed()
+            x = self._x
+            n = min(size - i, columns - x)
+            chars = self._chars[self._y]
+            chars[x : x + n] = array(_CHAR, data[4 * i : 4 * (i + n)])
+            self._attrs[self._y][x : x + n] = array(_ATTR, [self._attr]) * n
+            self._x = x + n
+            i += n
+
+    def _line_feed(self):
+        if self._y < self._rows - 1:
+            self._y += 1
+        else:
+            self._scrollback.append((self._chars.pop(0), self._attrs.pop(0)))
+            self._chars.append(array(_CHAR, self._blank_chars))
+            self._attrs.append(array(_ATTR, self._blank_attrs))
+
+    def _control(self, seq: str):
+        c = seq[0]
+        if c == "\n" or c == "\v" or c == "\f":
+            if self._crlf:
+                self._x = 0
+            self._line_feed()
+        elif c == "\r":
+            self._x = 0
+        elif c == "\b":
+            self._x = max(min(self._x, self._columns - 1) - 1, 0)
+        elif c == "\t":
+            self._x = min((self._x // 8 + 1) * 8, self._columns - 1)
+        elif c == "\x1b" and len(seq) == 2:
+            # Sequences with intermediate bytes, such as charset
+            # designations, are ignored.
+            c = seq[1]
+            if c == "7":
+                self._saved = self._x, self._y
+            elif c == "8":
+                self._x, self._y = self._saved
+            elif c == "c":
+                self._reset_screen()
+            elif c == "D":
+                self._line_feed()
+            elif c == "E":
+                self._x = 0
+                self._line_feed()
+            elif c == "M":
+                self._y = max(self._y - 1, 0)
+
+    def _erase(self, y: int, start: int, end: int):
+        self._chars[y][start:end] = self._blank_chars[start:end]
+        self._attrs[y][start:end] = self._blank_attrs[start:end]
+
+    def _csi(self, params: str, final: str):
+        if params.startswith(("?", ">", "<", "=")):
+            return
+        args = _parse_params(params)
+        arg = args[0] if args else 0
+        columns = self._columns
+        rows = self._rows
+        x = min(self._x, columns - 1)
+        if final in "ABCDEF":
+            n = arg or 1
+            if final == "A" or final == "F":
+                self._y = max(self._y - n, 0)
+            elif final == "B" or final == "E":
+                self._y = min(self._y + n, rows - 1)
+            elif final == "C":
+                x = min(x + n, columns - 1)
+            else:
+                x = max(x - n, 0)
+            self._x = 0 if final in "EF" else x
+        elif final == "H" or final == "f":
+            row = args[0] if args else 0
+            col = args[1] if len(args) > 1 else 0
+            self._y = min(max(row, 1), rows) - 1
+            self._x = min(max(col, 1), columns) - 1
+        elif final == "G" or final == "`":
+            self._x = min(max(arg, 1), columns) - 1
+        elif final == "d":
+            self._y = min(max(arg, 1), rows) - 1
+        elif final == "J":
+            y = self._y
+            if arg == 0:
+                self._erase(y, x, columns)
+                for i in range(y + 1, rows):
+                    self._erase(i, 0, columns)
+            elif arg == 1:
+                for i in range(y):
+                    self._erase(i, 0, columns)
+                self._erase(y, 0, x + 1)
+            elif arg == 2 or arg == 3:
+                for i in range(rows):
+                    self._erase(i, 0, columns)
+                if arg == 3:
+                    self._scrollback.clear()
+        elif final == "K":
+            if arg == 0:
+                self._erase(self._y, x, columns)
+            elif arg == 1:
+                self._erase(self._y, 0, x + 1)
+            elif arg == 2:
+                self._erase(self._y, 0, columns)
+        elif final == "s":
+            self._saved = self._x, self._y
+        elif final == "u":
+            self._x, self._y = self._saved
+
+    def _lines(self, scrollback: bool) -> List[Tuple[array, array]]:
+        lines = list(zip(self._chars, self._attrs))
+        if scrollback:
+            lines = list(self._scrollback) + lines
+        return lines
+
+    def text(self, scrollback: bool = False) -> str:
+        """
+        Dump the screen as plain text with trailing spaces removed.
+
+        :param scrollback: whether to include the scrollback
+        :return: the lines of the screen joined by line feeds
+        """
+        return "\n".join(
+            chars.tobytes().decode(_ENCODING, _ERRORS).rstrip(" ")
+            for chars, _ in self._lines(scrollback)
+        )
+
+    def styled(self, scrollback: bool = False) -> str:
+        """
+        Dump the screen as text formatted with ANSI escape codes.
+
+        Trailing unstyled spaces are removed and the style is reset at the end
+        of every line.
+
+        :param scrollback: whether to include the scrollback
+        :return: the lines of the screen joined by line feeds
+        """
+        transitions: Dict[Tuple[int, int], str] = {}
+        res = []
+        for chars, attrs in self._lines(scrollback):
+            line = chars.tobytes().decode(_ENCODING, _ERRORS)
+            end = len(line.rstrip(" "))
+            if attrs[end:].count(0) < len(line) - end:
+                end = len(line)
+                while not attrs[end - 1] and line[end - 1] == " ":
+                    end -= 1
+            attrs = attrs[:end]
+            if attrs.count(0) == end:
+                res.append(line[:end])
+                continue
+            if attrs.count(attrs[0]) == end:
+                groups = [(attrs[0], end)]
+            else:
+                groups = [
+                    (attr, len(list(group))) for attr, group in groupby(attrs)
+                ]
+            parts = []
+            pos = 0
+            state = 0
+            for attr, n in groups + [(0, 0)]:
+                key = (state, attr)
+                if key not in transitions:
+                    transitions[key] = _unpack(state).transition(_unpack(attr))
+                parts.append(transitions[key])
+                parts.append(line[pos : pos + n])
+                pos += n
+                state = attr
+            res.append("".join(parts))
+        return "\n".join(res)
+
+
+def _parse_params(params: str) -> List[int]:
+    if not params:
+        return []
+    res = []
+    for param in params.split(";"):
+        try:
+            res.append(int(param) if param else 0)
+        except ValueError:
+            res.append(0)
+    return res
@@ -256,6 +256,13 @@ class TestFmt(unittest.TestCase):
             ansifmt(text, attribs, fore, back, underline),
         )
 
+    def test_Ansiprefix(self):
+        text = "lorem ipsum"
+        self.assertEqual(
+            ansiprefix("*", "r") + text + "\x1b[m",
+            ansifmt(text, "*", "r"),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,97 @@
+import contextlib
+import io
+import os
+import re
+import signal
+import unittest
+
+from ansiesc import *
+
+
+class TestHighlight(unittest.TestCase):
+    def test_Highlighter(self):
+        highlighter = Highlighter(
+            [(r"(?i)\berror\b", "<e>"), (r"err\w*", "<r>"), ("x", "<x>")]
+        )
+        self.assertEqual(
+            "an <e>ERROR\x1b[m, <r>errno\x1b[m <x>x\x1b[m",
+            highlighter.feed("an ERROR, errno x"),
+        )
+        self.assertEqual(
+            "\x1b[1;32mok <e>error\x1b[m\x1b[1;32m\x1b[22m <x>x\x1b[m\x1b[32m",
+            highlighter.feed("\x1b[1;32mok error\x1b[22m x"),
+        )
+        self.assertEqual("\x1b[m<x>x\x1b[m", highlighter.feed("\x1b[mx"))
+
+        # Escape sequences split between chunks are held.
+        highlighter.reset()
+        self.assertEqual("<x>x\x1b[m", highlighter.feed("x\x1b[3"))
+        self.assertEqual("\x1b[31m<x>x\x1b[m\x1b[31m", highlighter.feed("1mx"))
+        self.assertEqual("", highlighter.feed("\x1b]0;x"))
+        self.assertEqual("\x1b]0;x", highlighter.close())
+
+        text = "\x1b[33mx\x1b[m, error"
+        self.assertEqual(text, Highlighter([]).feed(text))
+
+        # Rules are compiled separately.
+        highlighter = Highlighter(
+            [(r"(?P<c>\w)(?P=c)", "<2>"), (r"(?P<c>\w)(\w)\2", "<3>")]
+        )
+        self.assertEqual(
+            "x<3>abb\x1b[m <2>aa\x1b[mb", highlighter.feed("xabb aab")
+        )
+        self.assertRaises(re.error, Highlighter, [("(", "")])
+
+        # Matches do not contain escape sequences or depend on their
+        # characters.
+        highlighter = Highlighter([(r"\bab\b", "<ab>"), (r"\W", "<w>")])
+        self.assertEqual(
+            "a\x1b[1mb\x1b[1m<ab>ab\x1b[m\x1b[1m\x1b<w>\x01\x1b[m\x1b[1m",
+            highlighter.feed("a\x1b[1mb\x1b[1mab\x1b\x01"),
+        )
+
+    @unittest.skipUnless(os.name == "posix", "requires POSIX")
+    def test_run(self):
+        from ansiesc.run import run
+
+        def run_command(args):
+            read, write = os.pipe()
+            stdin = os.open(os.devnull, os.O_RDONLY)
+            try:
+                status = run(
+                    args, Highlighter([("error", "<e>")]), stdin, write
+                )
+                os.close(write)
+                output = b""
+                while True:
+                    data = os.read(read, 1024)
+                    if not data:
+                        break
+                    output += data
+            finally:
+                os.close(stdin)
+                os.close(read)
+            return status, output
+
+        self.assertEqual(
+            (3, b"an <e>error\x1b[m\r\n"),
+            run_command(["sh", "-c", "printf 'an error\\n'; exit 3"]),
+        )
+        self.assertEqual(
+            (127, b"no-such-command: No such file or directory\r\n"),
+            run_command(["no-such-command"]),
+        )
+        self.assertEqual(
+            (-signal.SIGTERM, b""), run_command(["sh", "-c", "kill -TERM $$"])
+        )
+
+    @unittest.skipUnless(os.name == "posix", "requires POSIX")
+    def test_main(self):
+        from ansiesc.__main__ import main
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertRaises(
+                SystemExit, main, ["run", "-r", "(", "*:r", "--", "true"]
+            )
+        self.assertIn("missing )", stderr.getvalue())
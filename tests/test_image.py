@@ -0,0 +1,44 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    from ansiesc.image import ansiimage
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestImage(unittest.TestCase):
+    def test_Ansiimage(self):
+        image = np.zeros((4, 4, 3), dtype=np.uint8)
+        image[:2, :2] = 255
+        image[2:, 2:] = (255, 0, 0)
+        self.assertEqual(
+            "\x1b[38;2;255;255;255;48;2;255;255;255m▀▀"
+            "\x1b[38;2;0;0;0;48;2;0;0;0m▀▀\x1b[m\n"
+            "\x1b[38;2;0;0;0;48;2;0;0;0m▀▀"
+            "\x1b[38;2;255;0;0;48;2;255;0;0m▀▀\x1b[m",
+            ansiimage(image),
+        )
+        self.assertEqual(
+            "\x1b[38;5;231;48;5;16m▀\x1b[38;5;16;48;5;196m▀\x1b[m",
+            ansiimage(image / 255, width=2, depth=8),
+        )
+        self.assertEqual(
+            "\x1b[97;40m▀\x1b[30;101m▀\x1b[m",
+            ansiimage(image, height=1, depth=4),
+        )
+        image[0, 0] = 0
+        self.assertEqual(
+            "\x1b[30;107m▀\x1b[97m▀\x1b[30;40m▀▀\x1b[m",
+            ansiimage(image[:2], depth=4).split("\n")[0],
+        )
+        self.assertRaises(ValueError, ansiimage, image, depth=16)
+        self.assertRaises(ValueError, ansiimage, image[..., 0])
+        self.assertRaises(ValueError, ansiimage, np.zeros((0, 0, 3)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import re
+import unittest
+
+from ansiesc import *
+
+
+class TestJsoncolor(unittest.TestCase):
+    def test_JSONColorizer(self):
+        text = '{"a" : [1, -2.5e3, true, null, "b\\"c"],\n "d": {}}\n'
+        styles = {kind: f"<{kind}>" for kind in ("key", "string", "number")}
+        styles.update(boolean="", null="")
+        self.assertEqual(
+            '{<key>"a"\x1b[m : [<number>1\x1b[m, <number>-2.5e3\x1b[m, true,'
+            ' null, <string>"b\\"c"\x1b[m],\n <key>"d"\x1b[m: {}}\n',
+            JSONColorizer(styles).feed(text, True),
+        )
+
+        colorizer = JSONColorizer()
+        full = colorizer.feed(text, True)
+        self.assertEqual(text, re.sub("\x1b\\[[0-9;]*m", "", full))
+        for size in (1, 2, 3, 7):
+            chunks = [
+                text[i : i + size].encode() for i in range(0, len(text), size)
+            ]
+            self.assertEqual(
+                full,
+                "".join(colorizer.feed(chunk) for chunk in chunks)
+                + colorizer.close(),
+            )
+
+        # Long strings are emitted before they end.
+        text = '["' + "a\\\\" * 2000 + '", 1]'
+        full = JSONColorizer().feed(text, True)
+        colorizer = JSONColorizer()
+        head = colorizer.feed(text[:4097])
+        self.assertEqual("[" + ansiprefix(fore="g") + text[1:4097], head)
+        self.assertEqual(
+            full,
+            head
+            + "".join(
+                colorizer.feed(text[i : i + 99])
+                for i in range(4097, len(text), 99)
+            )
+            + colorizer.close(),
+        )
+
+        colorizer = JSONColorizer()
+        self.assertEqual(ansifmt("1", fore="c") + ", ", colorizer.feed("1, 2"))
+        self.assertEqual(ansifmt("2", fore="c"), colorizer.close())
+
+        # A truncated UTF-8 sequence is flushed by close.
+        colorizer = JSONColorizer()
+        self.assertEqual("[", colorizer.feed(b'["a\xc3'))
+        self.assertEqual('"a\ufffd', colorizer.close())
+        self.assertEqual('["a\ufffd', JSONColorizer().feed(b'["a\xc3', True))
+        self.assertRaises(ValueError, JSONColorizer, {"word": ""})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import io
+import threading
+import unittest
+
+from ansiesc import *
+
+
+class TestLive(unittest.TestCase):
+    def test_Progress_bar(self):
+        self.assertEqual("##--", progress_bar(0.5, 4, "#", "-"))
+        self.assertEqual("####", progress_bar(2, 4, "#", "-"))
+        self.assertEqual(
+            "\x1b[32m#\x1b[m---",
+            progress_bar(0.25, 4, "#", "-", ansiprefix(fore="g")),
+        )
+
+    def test_LiveRegion(self):
+        stream = io.StringIO()
+        region = LiveRegion(3, stream=stream)
+        region.refresh()
+        self.assertEqual("\n\n\n", stream.getvalue())
+
+        stream.seek(0)
+        stream.truncate()
+        region.update(1, "b")
+        region.refresh()
+        self.assertEqual("\x1b[s\x1b[2A\r\x1b[0Kb\x1b[u", stream.getvalue())
+
+        stream.seek(0)
+        stream.truncate()
+        region.refresh()
+        self.assertEqual("", stream.getvalue())
+
+        stream.seek(0)
+        stream.truncate()
+        region.print("log", 1)
+        region.refresh()
+        self.assertEqual(
+            "\x1b[3A\r\x1b[0Klog 1\n\r\x1b[0K\n\r\x1b[0Kb\n\r\x1b[0K\n",
+            stream.getvalue(),
+        )
+
+        stream.seek(0)
+        stream.truncate()
+        region.print("x\ny")
+        region.refresh()
+        self.assertEqual(
+            "\x1b[3A\r\x1b[0Kx\n\r\x1b[0Ky\n"
+            "\r\x1b[0K\n\r\x1b[0Kb\n\r\x1b[0K\n",
+            stream.getvalue(),
+        )
+
+    def test_LiveRegion_threads(self):
+        stream = io.StringIO()
+        with LiveRegion(4, fps=1000, stream=stream) as region:
+
+            def work(i):
+                for j in range(100):
+                    region[i] = f"{i}:{j}"
+
+            threads = [
+                threading.Thread(target=work, args=(i,)) for i in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual([f"{i}:99" for i in range(4)], list(region))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+
+from ansiesc import *
+
+
+class TestOverlay(unittest.TestCase):
+    def test_StyleOverlay(self):
+        overlay = StyleOverlay("hello world\nsecond line\nthird")
+        overlay.add(0, 5, "*")
+        handle = overlay.add(3, 8, fore="r")
+        overlay.add(4, 15, fore="g", priority=-1)
+        self.assertEqual(3, len(overlay))
+        self.assertEqual(
+            "\x1b[1mhel\x1b[31mlo\x1b[22m wo\x1b[32mrld\nsec\x1b[mond line"
+            "\nthird",
+            overlay.render(),
+        )
+        self.assertEqual(ansifmt("w", fore="r"), overlay.render(6, 7))
+        self.assertEqual(
+            [ansifmt("sec", fore="g") + "ond line", "third"],
+            overlay.viewport(1, 5),
+        )
+        overlay.remove(handle)
+        self.assertEqual(
+            "\x1b[1mhell\x1b[32mo\x1b[22m world\x1b[m", overlay.render(0, 11)
+        )
+        self.assertRaises(KeyError, overlay.remove, handle)
+        self.assertRaises(ValueError, overlay.add, 0, 100)
+
+        # The global random generator is not used.
+        random.seed(0)
+        expected = random.random()
+        random.seed(0)
+        overlay.add(0, 1)
+        self.assertEqual(expected, random.random())
+
+    def test_StyleOverlay_overlapping(self):
+        size = 1000
+        overlay = StyleOverlay(size * " ")
+        ranges = {}
+        for _ in range(500):
+            start = random.randrange(size)
+            end = min(start + random.randrange(50), size)
+            ranges[overlay.add(start, end)] = (start, end)
+            if random.random() < 0.3:
+                handle = random.choice(tuple(ranges))
+                overlay.remove(handle)
+                del ranges[handle]
+        for _ in range(100):
+            start = random.randrange(size)
+            end = start + random.randrange(100)
+            self.assertEqual(
+                sorted(
+                    handle
+                    for handle, (first, last) in ranges.items()
+                    if first < end and last > start
+                ),
+                sorted(overlay.overlapping(start, end)),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
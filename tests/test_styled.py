@@ -0,0 +1,51 @@
+import unittest
+
+from ansiesc import *
+
+
+class TestStyled(unittest.TestCase):
+    def test_StyledText(self):
+        text = StyledText("a" + StyledText("b", fore="r") + "c", "*")
+        self.assertEqual(3, len(text))
+        self.assertEqual("abc", text.plain)
+        self.assertEqual("\x1b[1ma\x1b[31mb\x1b[39mc\x1b[m", str(text))
+        self.assertEqual("\x1b[1ma\x1b[31mb\x1b[m", str(text[:2]))
+        self.assertEqual(ansifmt("b", "*", "r"), str(text[1]))
+        self.assertEqual(ansifmt("c", "*"), str(text[-1:]))
+        self.assertEqual("", str(text[3:]))
+        self.assertEqual(StyledText("c", "*"), text[2])
+        self.assertEqual(text[:1] + text[1:], text)
+
+        # Equal colors of different types are not confused by caching.
+        for fore in ((1, 1, 1), (1.0, 1.0, 1.0), [1, 1, 1], 1, 1.0):
+            self.assertEqual(
+                ansifmt("x", fore=fore), str(StyledText("x", fore=fore))
+            )
+
+    def test_StyledText_append(self):
+        text = StyledText()
+        for _ in range(3):
+            text += StyledText("x", "*/")
+            text.append("y", "*")
+        text += "z"
+        self.assertEqual(7, len(text))
+        self.assertEqual(
+            "\x1b[1;3mx\x1b[23my" + "\x1b[3mx\x1b[23my" * 2 + "\x1b[mz",
+            str(text),
+        )
+        self.assertEqual(
+            ansifmt("xy", "_"),
+            str(StyledText("x", "_") + StyledText("y", "_")),
+        )
+        self.assertEqual(
+            "\x1b[32mx\x1b[38;5;9my\x1b[m",
+            str(StyledText("x", fore="g") + StyledText("y", fore=[9])),
+        )
+        self.assertEqual(
+            "\x1b[9mx\x1b[0;1my\x1b[m",
+            str(StyledText("x", "-") + StyledText("y", "*")),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from ansiesc import *
+
+RESET = "\x1b[m"
+
+
+class TestTable(unittest.TestCase):
+    def test_Ansitable(self):
+        rows = [("a", 1, "x"), ("bcd", 22), ("中", 3, "yz")]
+        self.assertEqual(
+            "a    1  x\nbcd 22   \n中   3 yz",
+            ansitable(rows, align="<>>"),
+        )
+        bold = ansiprefix("*")
+        red = ansiprefix(fore="r")
+        self.assertEqual(
+            f"{bold}a{RESET}  {red}1{RESET}\n"
+            f"{bold}bc{RESET} {bold}2{RESET}",
+            ansitable(
+                [("a", 1), ("bc", 2)],
+                styles=[bold, None],
+                cell_style=lambda i, j, value: (
+                    red if value == 1 else bold if j else None
+                ),
+            ),
+        )
+
+    def test_Ansitable_iter(self):
+        rows = [("ab", 1), ("c", 2), ("defg", 333)]
+        self.assertEqual(
+            ["ab 1", "c  2", "de 3"],
+            list(ansitable_iter(iter(rows), sample=2)),
+        )
+        self.assertEqual(
+            ["ab |1 ", " c |2 ", "def|33"],
+            list(ansitable_iter(rows, widths=(3, 2), align="^", sep="|")),
+        )
+        self.assertEqual(
+            "\n".join(ansitable_iter(rows, sample=len(rows))),
+            ansitable(rows),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
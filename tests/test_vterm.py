@@ -0,0 +1,58 @@
+import unittest
+
+from ansiesc import *
+
+
+class TestVterm(unittest.TestCase):
+    def test_VirtualTerminal(self):
+        term = VirtualTerminal(10, 3)
+        term.write("hello " + ansifmt("world", "*", "r") + "\nabc")
+        self.assertEqual("hello worl\nd\nabc", term.text())
+        self.assertEqual(
+            "hello \x1b[1;31mworl\x1b[m\n\x1b[1;31md\x1b[m\nabc",
+            term.styled(),
+        )
+        self.assertEqual((3, 2), term.cursor)
+
+        term.write("\n")
+        self.assertEqual("d\nabc\n", term.text())
+        self.assertEqual("hello worl\nd\nabc\n", term.text(True))
+
+        term.write(ANSIControl.CUP.format(1, 2) + "X")
+        term.write(ANSIControl.SCP + ANSIControl.CUD.format(2))
+        term.write(ANSIControl.CUF.format(3) + "Y" + ANSIControl.RCP + "Z")
+        self.assertEqual("dXZ\nabc\n     Y", term.text())
+
+        term.write(ANSIControl.CUB.format(9) + ANSIControl.EL.format(0))
+        self.assertEqual("\nabc\n     Y", term.text())
+        term.write(ANSIControl.CUU.format(1) + ANSIControl.ED.format(2))
+        self.assertEqual("\n\n", term.text())
+
+        # Sequences with intermediate bytes do not move the cursor.
+        term = VirtualTerminal(10, 2)
+        term.write("ab\x1b(Ecd\x1b#8e\x1b7\x1bEf")
+        self.assertEqual("abcde\nf", term.text())
+
+        term.write("\x1b8a\ud800")
+        self.assertEqual("abcdea\ud800\nf", term.text())
+
+    def test_VirtualTerminal_chunks(self):
+        data = (
+            ansifmt("a", fore=[200]) + "\x1b]0;title\x07" + "b\x1b[42mc\x1b[m"
+        ).encode() + "é".encode()
+        term = VirtualTerminal(10, 1)
+        for i in range(len(data)):
+            term.write(data[i : i + 1])
+        self.assertEqual("abcé", term.text())
+        self.assertEqual(
+            "\x1b[38;5;200ma\x1b[mb\x1b[42mc\x1b[mé", term.styled()
+        )
+
+        # A reset within a chunk keeps the held escape sequence.
+        term.write("a\x1bcb\x1b[3")
+        term.write("1mX")
+        self.assertEqual("b\x1b[31mX\x1b[m", term.styled())
+
+
+if __name__ == "__main__":
+    unittest.main()